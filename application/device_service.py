@@ -1,17 +1,34 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timedelta, UTC
-from domain.model.aggregates.device import Device, DeviceId, DeviceType, DeviceStatus, Location
+from domain.model.aggregates.device import Device, DeviceId, DeviceType, DeviceStatus, DeviceSummary, Location
 from domain.repository.device_repository import DeviceRepository
+from infrastructure.cache.ttl_cache import async_ttl_cache
 from infrastructure.http.backend_client import BackendClient
+from infrastructure.http.backend_sync_worker import get_sync_worker, map_status_to_backend
 import logging
-import asyncio
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _device_id(value: str) -> DeviceId:
+    """Intern DeviceId value objects; ids form a small stable set (one per
+    physical sensor), so repeat requests reuse the validated instance"""
+    return DeviceId(value)
+
+
 class DeviceService:
     """Application service for device operations with backend sync"""
 
+    # Version compartida entre instancias (el servicio se crea por request):
+    # cada escritura la incrementa y con eso expiran las listas cacheadas
+    _cache_version = 0
+
+    @staticmethod
+    def _invalidate_list_caches():
+        DeviceService._cache_version += 1
+
     def __init__(
             self,
             repository: DeviceRepository,
@@ -30,11 +47,11 @@ class DeviceService:
             position: str
     ) -> Device:
         """Register a new IoT device"""
-        device_id_vo = DeviceId(device_id)
+        device_id_vo = _device_id(device_id)
 
         # Check if device already exists
         if await self._repository.exists(device_id_vo):
-            logger.info(f"Device {device_id} already exists in Edge API")
+            logger.debug("Device %s already exists in Edge API", device_id)
             # Return existing device
             return await self._repository.find_by_id(device_id_vo)
 
@@ -51,6 +68,7 @@ class DeviceService:
 
         # Save in Edge API (PostgreSQL)
         saved_device = await self._repository.save(device)
+        self._invalidate_list_caches()
 
         return saved_device
 
@@ -61,148 +79,145 @@ class DeviceService:
             threshold: float = 30.0
     ) -> Device:
         """Update device reading and sync status with backend"""
-        device_id_vo = DeviceId(device_id)
-        device = await self._repository.find_by_id(device_id_vo)
+        if not 0 <= pressure <= 100:
+            raise ValueError("Pressure must be between 0 and 100")
 
-        if not device:
-            raise ValueError(f"Device {device_id} not found")
-
-        # Guardar estado anterior
-        previous_status = device.status
-
-        # Update device status based on pressure
-        device.update_reading(pressure, threshold)
-        saved_device = await self._repository.save(device)
+        now = datetime.now(UTC)
 
-        # Sync status with backend asynchronously (non-blocking)
-        if self._backend_enabled:
-            asyncio.create_task(
-                self._sync_cubicle_status(saved_device, previous_status)
-            )
+        # Single UPDATE ... RETURNING: status derivation happens in the
+        # repository instead of a read-modify-write round trip
+        device, previous_status = await self._repository.update_reading_atomic(
+            _device_id(device_id), pressure, threshold, now
+        )
 
-        return saved_device
+        if device is None:
+            raise ValueError(f"Device {device_id} not found")
 
-    async def _sync_cubicle_status(self, device: Device, previous_status: DeviceStatus):
-        """
-        Sync availability slot status with backend (background task).
-        Si el estado cambia de OCCUPIED a AVAILABLE, cancela el booking activo.
-        """
-        try:
-            # Verificar que el device esté asignado a un cubículo
-            if device.cubicle_id is None:
-                logger.warning(
-                    f"Device {device.id.value} not assigned to any cubicle. "
-                    f"Skipping backend sync. Use PATCH /devices/{{id}}/assign-cubicle first."
-                )
-                return
-
-            cubicle_id = device.cubicle_id
-            current_status = device.status.value
-            backend_status = self._map_status_to_backend(current_status)
-
-            logger.info(
-                f"Syncing device {device.id.value} → cubicle {cubicle_id} → "
-                f"status change: {previous_status.value} → {current_status}"
-            )
+        self._invalidate_list_caches()
 
-            async with BackendClient(self._backend_url) as client:
-                # IMPORTANTE: Si el estado cambió a AVAILABLE, cancelar el booking activo
-                if device.status == DeviceStatus.AVAILABLE:
+        # Sync status with backend via the coalescing queue (non-blocking),
+        # but only when the mapped backend state actually changed — most
+        # readings within a session stay on the same side of the threshold
+        if self._backend_enabled and (
+                previous_status is None
+                or map_status_to_backend(previous_status) != map_status_to_backend(device.status)
+        ):
+            self._schedule_backend_sync(device)
 
-                    logger.info(f"🔓 Cubicle {cubicle_id} is now AVAILABLE. Cancelling active booking...")
+        return device
 
-                    # Obtener fecha y hora actual en Lima (UTC-5)
-                    from datetime import timezone, timedelta
-                    LIMA_TZ = timezone(timedelta(hours=-5))
-                    now_lima = datetime.now(LIMA_TZ)
+    async def update_device_readings_batch(
+            self,
+            readings: List[tuple]
+    ) -> List[Device]:
+        """Apply a burst of readings (device_id, pressure, threshold) at once.
 
-                    date_str = now_lima.strftime("%Y-%m-%d")
-                    time_str = now_lima.strftime("%H:%M:%S")
+        Coalesces repeat readings per device (last one wins) and hits the
+        repository with a single batched write; backend syncs go through
+        the same coalescing queue as single readings.
+        """
+        deduped = {}
+        for device_id, pressure, threshold in readings:
+            if not 0 <= pressure <= 100:
+                raise ValueError("Pressure must be between 0 and 100")
+            deduped[device_id] = (_device_id(device_id), pressure, threshold)
+
+        now = datetime.now(UTC)
+        updated = await self._repository.update_readings_batch(
+            list(deduped.values()), now
+        )
 
-                    cancel_success = await client.cancel_current_booking(
-                        cubicle_id,
-                        date=date_str,
-                        time=time_str
-                    )
+        if updated:
+            self._invalidate_list_caches()
 
-                    if cancel_success:
-                        logger.info(f"✓ Booking cancelled successfully for cubicle {cubicle_id}")
-                    else:
-                        logger.warning(
-                            f"⚠ Could not cancel booking for cubicle {cubicle_id} (might be already available)")
+        devices = []
+        for device, previous_status in updated:
+            if self._backend_enabled and (
+                    previous_status is None
+                    or map_status_to_backend(previous_status) != map_status_to_backend(device.status)
+            ):
+                self._schedule_backend_sync(device)
+            devices.append(device)
 
-                # Actualizar el estado del availability slot
-                success = await client.update_availability_slot_status(cubicle_id, backend_status)
+        return devices
 
-                if success:
-                    logger.info(
-                        f"✓ Successfully synced availability slot status for cubicle {cubicle_id} to {backend_status}")
-                else:
-                    logger.warning(f"⚠ Failed to sync availability slot status for cubicle {cubicle_id}")
+    @staticmethod
+    def _schedule_backend_sync(device: Device):
+        """Enqueue a cubicle status sync on the background worker"""
+        if device.cubicle_id is None:
+            logger.warning(
+                f"Device {device.id.value} not assigned to any cubicle. "
+                f"Skipping backend sync. Use PATCH /devices/{{id}}/assign-cubicle first."
+            )
+            return
 
-        except Exception as e:
-            logger.error(f"❌ Error syncing cubicle status to backend: {str(e)}", exc_info=True)
+        worker = get_sync_worker()
+        if worker is None:
+            logger.warning("Backend sync worker not running, skipping sync")
+            return
 
-    @staticmethod
-    def _map_status_to_backend(edge_status: str) -> str:
-        """
-        Map Edge API status to Backend booking status.
-        Edge API: available, occupied, offline, error
-        Backend: AVAILABLE, RESERVED (only 2 states)
-        """
-        status_map = {
-            "available": "AVAILABLE",
-            "occupied": "RESERVED",
-            "offline": "AVAILABLE",
-            "error": "AVAILABLE"
-        }
-        return status_map.get(edge_status.lower(), "AVAILABLE")
+        worker.enqueue(device.cubicle_id, device.status)
 
     async def get_device(self, device_id: str) -> Optional[Device]:
         """Get device by ID"""
-        return await self._repository.find_by_id(DeviceId(device_id))
+        return await self._repository.find_by_id(_device_id(device_id))
 
+    @async_ttl_cache(ttl=1.5)
     async def get_all_devices(self) -> List[Device]:
         """Get all devices"""
         return await self._repository.find_all()
 
+    def stream_all_devices(self) -> AsyncIterator[Device]:
+        """Iterate over all devices without holding the full fleet in memory"""
+        return self._repository.stream_all()
+
+    @async_ttl_cache(ttl=1.5)
     async def get_devices_by_branch(self, branch_id: str) -> List[Device]:
         """Get devices by branch"""
         return await self._repository.find_by_branch(branch_id)
 
+    async def get_device_summaries(
+            self,
+            branch_id: str,
+            status: Optional[DeviceStatus] = None
+    ) -> List[DeviceSummary]:
+        """Get lightweight device summaries for list views"""
+        return await self._repository.find_summaries_by_branch(branch_id, status)
+
+    @async_ttl_cache(ttl=1.5)
     async def get_available_devices(self, branch_id: Optional[str] = None) -> List[Device]:
         """Get available devices (optionally filtered by branch)"""
         if branch_id:
-            devices = await self._repository.find_by_branch(branch_id)
-            return [d for d in devices if d.status == DeviceStatus.AVAILABLE]
+            return await self._repository.find_by_branch_and_status(branch_id, DeviceStatus.AVAILABLE)
 
         return await self._repository.find_by_status(DeviceStatus.AVAILABLE)
 
+    @async_ttl_cache(ttl=1.5)
     async def get_occupied_devices(self, branch_id: Optional[str] = None) -> List[Device]:
         """Get occupied devices (optionally filtered by branch)"""
         if branch_id:
-            devices = await self._repository.find_by_branch(branch_id)
-            return [d for d in devices if d.status == DeviceStatus.OCCUPIED]
+            return await self._repository.find_by_branch_and_status(branch_id, DeviceStatus.OCCUPIED)
 
         return await self._repository.find_by_status(DeviceStatus.OCCUPIED)
 
     async def check_offline_devices(self, timeout_minutes: int = 5) -> List[Device]:
         """Check and mark devices as offline if no updates"""
-        all_devices = await self._repository.find_all()
-        offline_devices = []
-        cutoff_time = datetime.now(UTC) - timedelta(minutes=timeout_minutes)
-
-        for device in all_devices:
-            if device.last_update < cutoff_time and device.status != DeviceStatus.OFFLINE:
-                device.mark_offline()
-                await self._repository.save(device)
-                offline_devices.append(device)
+        now = datetime.now(UTC)
+        cutoff_time = now - timedelta(minutes=timeout_minutes)
 
-        return offline_devices
+        # One UPDATE ... RETURNING: the DB finds and transitions stale
+        # devices, only the affected rows come back
+        swept = await self._repository.sweep_offline(cutoff_time, now)
+        if swept:
+            self._invalidate_list_caches()
+        return swept
 
     async def delete_device(self, device_id: str) -> bool:
         """Delete a device"""
-        return await self._repository.delete(DeviceId(device_id))
+        deleted = await self._repository.delete(_device_id(device_id))
+        if deleted:
+            self._invalidate_list_caches()
+        return deleted
 
     async def check_backend_health(self) -> bool:
         """Check if backend is available"""
@@ -210,8 +225,13 @@ class DeviceService:
             return False
 
         try:
-            async with BackendClient(self._backend_url, timeout=5.0) as client:
-                return await client.health_check()
+            # Reuse the worker's long-lived client instead of building a
+            # new wrapper per probe
+            worker = get_sync_worker()
+            if worker and worker.client:
+                return await worker.client.health_check()
+
+            return await BackendClient(self._backend_url, timeout=5.0).health_check()
         except Exception as e:
             logger.error(f"Backend health check failed: {str(e)}")
             return False
@@ -222,34 +242,37 @@ class DeviceService:
             cubicle_id: int
     ) -> Device:
         """Assign a device to a cubicle"""
-        device_id_vo = DeviceId(device_id)
-        device = await self._repository.find_by_id(device_id_vo)
+        if cubicle_id <= 0:
+            raise ValueError("Cubicle ID must be positive")
 
-        if not device:
-            raise ValueError(f"Device {device_id} not found")
+        now = datetime.now(UTC)
 
-        # Check if cubicle already has a device assigned
-        existing_device = await self._repository.find_by_cubicle_id(cubicle_id)
-        if existing_device and existing_device.id.value != device_id:
-            raise ValueError(f"Cubicle {cubicle_id} already has device {existing_device.id.value} assigned")
+        # Single UPDATE; the partial unique index on cubicle_id enforces
+        # one device per cubicle without a pre-check round trip
+        device = await self._repository.assign_cubicle_atomic(
+            _device_id(device_id), cubicle_id, now
+        )
 
-        device.assign_to_cubicle(cubicle_id)
-        saved_device = await self._repository.save(device)
+        if device is None:
+            raise ValueError(f"Device {device_id} not found")
 
-        logger.info(f"Device {device_id} assigned to cubicle {cubicle_id}")
+        self._invalidate_list_caches()
+        logger.debug("Device %s assigned to cubicle %s", device_id, cubicle_id)
 
-        return saved_device
+        return device
 
     async def unassign_device_from_cubicle(self, device_id: str) -> Device:
         """Remove cubicle assignment from device"""
-        device_id_vo = DeviceId(device_id)
+        device_id_vo = _device_id(device_id)
         device = await self._repository.find_by_id(device_id_vo)
 
         if not device:
             raise ValueError(f"Device {device_id} not found")
 
         device.unassign_from_cubicle()
-        return await self._repository.save(device)
+        saved = await self._repository.save(device)
+        self._invalidate_list_caches()
+        return saved
 
     async def get_device_by_cubicle(self, cubicle_id: int) -> Optional[Device]:
         """Get device assigned to a specific cubicle"""
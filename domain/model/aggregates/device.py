@@ -1,14 +1,22 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
 from domain.model.valueobjects.device_status import DeviceStatus
 from domain.model.valueobjects.device_type import DeviceType
 
-# Zona horaria de Lima/Perú (UTC-5)
+# Zona horaria de Lima/Perú (UTC-5). Los timestamps internos viven en UTC
+# (comparaciones homogéneas); Lima se aplica sólo al serializar.
 LIMA_TZ = timezone(timedelta(hours=-5))
 
-@dataclass(frozen=True)
+
+def _to_lima_iso(dt: datetime) -> str:
+    """Format a timestamp in Lima local time for API consumers"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(LIMA_TZ)
+    return dt.isoformat()
+
+@dataclass(frozen=True, slots=True)
 class DeviceId:
     value: str
 
@@ -17,48 +25,79 @@ class DeviceId:
             raise ValueError("DeviceId must have at least 3 characters")
 
 
-@dataclass(frozen=True)
-class PressureReading:
-    value: float
-    unit: str = "%"
-    timestamp: datetime = None
-
-    def __post_init__(self):
-        if self.value < 0 or self.value > 100:
-            raise ValueError("Pressure must be between 0 and 100")
-        if self.timestamp is None:
-            object.__setattr__(self, 'timestamp', datetime.now(timezone.utc).astimezone(LIMA_TZ))
+# Unidad de las lecturas de presión (porcentaje de presión sobre el sensor)
+READING_UNIT = "%"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Location:
     branch_id: str
     zone: str
     position: str
+    # Dict view built once at construction; Location is frozen so it never
+    # goes stale and to_dict() can reuse it per serialization
+    _as_dict: dict = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if not all([self.branch_id, self.zone, self.position]):
             raise ValueError("All location fields are required")
+        object.__setattr__(self, '_as_dict', {
+            "branch_id": self.branch_id,
+            "zone": self.zone,
+            "position": self.position
+        })
 
+    def to_dict(self) -> dict:
+        return self._as_dict
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
+class DeviceSummary:
+    """Lightweight read-model for list endpoints (no reading hydration)"""
+    id: str
+    status: DeviceStatus
+    cubicle_id: Optional[int]
+    zone: str
+    position: str
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "cubicle_id": self.cubicle_id,
+            "zone": self.zone,
+            "position": self.position
+        }
+
+
+@dataclass(slots=True)
 class Device:
     id: DeviceId
     type: DeviceType
     status: DeviceStatus
     location: Location
-    last_reading: Optional[PressureReading] = None
+    # Last reading stored flat (value + timestamp) to avoid allocating a
+    # value object per sensor update
+    last_reading_value: Optional[float] = None
+    last_reading_ts: Optional[datetime] = None
     last_update: datetime = None
     cubicle_id: Optional[int] = None
 
     def __post_init__(self):
         if self.last_update is None:
-            self.last_update = datetime.now(timezone.utc).astimezone(LIMA_TZ)
+            self.last_update = datetime.now(timezone.utc)
 
     def update_reading(self, pressure: float, threshold: float = 30.0):
         """Update device reading and determine status"""
-        self.last_reading = PressureReading(value=pressure)
-        self.last_update = datetime.now(timezone.utc).astimezone(LIMA_TZ)
+        if pressure < 0 or pressure > 100:
+            raise ValueError("Pressure must be between 0 and 100")
+
+        # Take the clock reading once and share it between the reading
+        # timestamp and last_update
+        now = datetime.now(timezone.utc)
+        self.last_reading_value = pressure
+        self.last_reading_ts = now
+        self.last_update = now
 
         # Determine status based on pressure threshold
         if pressure >= threshold:
@@ -69,40 +108,36 @@ class Device:
     def mark_offline(self):
         """Mark device as offline"""
         self.status = DeviceStatus.OFFLINE
-        self.last_update = datetime.now(timezone.utc).astimezone(LIMA_TZ)
+        self.last_update = datetime.now(timezone.utc)
 
     def mark_error(self):
         """Mark device with error status"""
         self.status = DeviceStatus.ERROR
-        self.last_update = datetime.now(timezone.utc).astimezone(LIMA_TZ)
+        self.last_update = datetime.now(timezone.utc)
 
     def assign_to_cubicle(self, cubicle_id: int):
         """Assign device to a cubicle"""
         if cubicle_id <= 0:
             raise ValueError("Cubicle ID must be positive")
         self.cubicle_id = cubicle_id
-        self.last_update = datetime.now(timezone.utc).astimezone(LIMA_TZ)
+        self.last_update = datetime.now(timezone.utc)
 
     def unassign_from_cubicle(self):
         """Remove cubicle assignment"""
         self.cubicle_id = None
-        self.last_update = datetime.now(timezone.utc).astimezone(LIMA_TZ)
+        self.last_update = datetime.now(timezone.utc)
 
     def to_dict(self):
         return {
             "id": self.id.value,
             "type": self.type.value,
             "status": self.status.value,
-            "location": {
-                "branch_id": self.location.branch_id,
-                "zone": self.location.zone,
-                "position": self.location.position
-            },
-            "cubicle_id": self.cubicle_id,  # ← AGREGAR ESTA LÍNEA
+            "location": self.location.to_dict(),
+            "cubicle_id": self.cubicle_id,
             "last_reading": {
-                "value": self.last_reading.value,
-                "unit": self.last_reading.unit,
-                "timestamp": self.last_reading.timestamp.isoformat()
-            } if self.last_reading else None,
-            "last_update": self.last_update.isoformat()
+                "value": self.last_reading_value,
+                "unit": READING_UNIT,
+                "timestamp": _to_lima_iso(self.last_reading_ts)
+            } if self.last_reading_value is not None else None,
+            "last_update": _to_lima_iso(self.last_update)
         }
\ No newline at end of file
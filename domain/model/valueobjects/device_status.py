@@ -1,7 +1,8 @@
 from enum import Enum
 
 
-class DeviceStatus(Enum):
+class DeviceStatus(str, Enum):
+    """Device status; str-backed so comparisons and serialization stay cheap"""
     AVAILABLE = "available"
     OCCUPIED = "occupied"
     OFFLINE = "offline"
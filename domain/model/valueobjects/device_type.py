@@ -1,7 +1,8 @@
 from enum import Enum
 
 
-class DeviceType(Enum):
+class DeviceType(str, Enum):
+    """Device type; str-backed so comparisons and serialization stay cheap"""
     CHAIR_SENSOR = "chair_sensor"
     TABLE_SENSOR = "table_sensor"
     ENVIRONMENTAL = "environmental"
\ No newline at end of file
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from domain.model.aggregates.device import Device, DeviceId, DeviceStatus
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from domain.model.aggregates.device import Device, DeviceId, DeviceStatus, DeviceSummary
 
 
 class DeviceRepository(ABC):
@@ -11,6 +12,35 @@ class DeviceRepository(ABC):
         """Save or update a device"""
         pass
 
+    @abstractmethod
+    async def update_reading_atomic(
+            self,
+            device_id: DeviceId,
+            pressure: float,
+            threshold: float,
+            now: datetime
+    ) -> Tuple[Optional[Device], Optional[DeviceStatus]]:
+        """Apply a sensor reading and derive status in one write.
+
+        Returns the updated device plus the status it had before the
+        update, or (None, None) if the device does not exist.
+        """
+        pass
+
+    @abstractmethod
+    async def update_readings_batch(
+            self,
+            readings: List[Tuple[DeviceId, float, float]],
+            now: datetime
+    ) -> List[Tuple[Device, DeviceStatus]]:
+        """Apply many sensor readings in one write.
+
+        Each item is (device_id, pressure, threshold). Returns (device,
+        previous_status) pairs for the devices that exist; unknown ids are
+        silently skipped.
+        """
+        pass
+
     @abstractmethod
     async def find_by_id(self, device_id: DeviceId) -> Optional[Device]:
         """Find device by ID"""
@@ -21,6 +51,11 @@ class DeviceRepository(ABC):
         """Find all devices"""
         pass
 
+    @abstractmethod
+    def stream_all(self) -> AsyncIterator[Device]:
+        """Iterate over all devices without materializing the full list"""
+        pass
+
     @abstractmethod
     async def find_by_branch(self, branch_id: str) -> List[Device]:
         """Find all devices in a branch"""
@@ -31,6 +66,29 @@ class DeviceRepository(ABC):
         """Find devices by status"""
         pass
 
+    @abstractmethod
+    async def find_by_branch_and_status(self, branch_id: str, status: DeviceStatus) -> List[Device]:
+        """Find devices in a branch filtered by status"""
+        pass
+
+    @abstractmethod
+    async def find_summaries_by_branch(
+            self,
+            branch_id: str,
+            status: Optional[DeviceStatus] = None
+    ) -> List[DeviceSummary]:
+        """Find lightweight device summaries for list views"""
+        pass
+
+    @abstractmethod
+    async def sweep_offline(self, cutoff: datetime, now: datetime) -> List[Device]:
+        """Mark every stale device offline in one operation.
+
+        A device is stale when last_update < cutoff and it is not already
+        offline. Returns the devices that were transitioned.
+        """
+        pass
+
     @abstractmethod
     async def delete(self, device_id: DeviceId) -> bool:
         """Delete a device"""
@@ -44,4 +102,18 @@ class DeviceRepository(ABC):
     @abstractmethod
     async def find_by_cubicle_id(self, cubicle_id: int) -> Optional[Device]:
         """Find device assigned to a cubicle"""
+        pass
+
+    @abstractmethod
+    async def assign_cubicle_atomic(
+            self,
+            device_id: DeviceId,
+            cubicle_id: int,
+            now: datetime
+    ) -> Optional[Device]:
+        """Assign a device to a cubicle in one write.
+
+        Returns the updated device, None if the device does not exist, and
+        raises ValueError if the cubicle is already taken by another device.
+        """
         pass
\ No newline at end of file
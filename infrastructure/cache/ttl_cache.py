@@ -0,0 +1,48 @@
+import time
+from functools import wraps
+from typing import Any, Dict, Tuple
+
+# Bound on entries per decorated method before expired ones are purged
+CACHE_MAX_ENTRIES = 1024
+
+
+def async_ttl_cache(ttl: float = 1.5):
+    """
+    TTL cache decorator for async methods.
+
+    The cache store lives on the decorated function, not the instance, so
+    it survives per-request service construction; `self` is excluded from
+    the key. If the instance exposes `_cache_version` it is folded into
+    the key, letting writers invalidate by bumping the version instead of
+    tracking individual entries.
+    """
+    def decorator(func):
+        cache: Dict[Tuple, Tuple[float, Any]] = {}
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (
+                args,
+                tuple(sorted(kwargs.items())),
+                getattr(self, "_cache_version", 0)
+            )
+
+            now = time.monotonic()
+            entry = cache.get(key)
+            if entry is not None and now < entry[0]:
+                return entry[1]
+
+            value = await func(self, *args, **kwargs)
+
+            if len(cache) >= CACHE_MAX_ENTRIES:
+                expired = [k for k, (expires_at, _) in cache.items() if now >= expires_at]
+                for k in expired:
+                    cache.pop(k, None)
+
+            cache[key] = (now + ttl, value)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
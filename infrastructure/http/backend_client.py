@@ -1,28 +1,125 @@
+import asyncio
 import logging
+import random
+import time
+from typing import Optional
 
 import httpx
+import orjson
+
+from infrastructure.http.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Reintentos ante fallas transitorias (timeout / transporte)
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+
+# Circuit breaker: tras N fallas consecutivas se corta el tráfico por T
+# segundos para no saturar el event loop contra un backend caído
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+
+class _CircuitBreaker:
+    """Estado mínimo de circuit breaker compartido por todos los clientes"""
+
+    def __init__(self):
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+
+        if time.monotonic() - self._opened_at >= BREAKER_RESET_SECONDS:
+            # Half-open: deja pasar un intento de prueba
+            self._opened_at = None
+            return True
+
+        return False
+
+    def record_success(self):
+        self._consecutive_failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= BREAKER_FAILURE_THRESHOLD and self._opened_at is None:
+            self._opened_at = time.monotonic()
+            logger.warning(
+                f"Backend circuit breaker opened after {self._consecutive_failures} "
+                f"consecutive failures; failing fast for {BREAKER_RESET_SECONDS}s"
+            )
+
+
+# Compartido a nivel de módulo: los BackendClient se construyen por uso
+# pero hablan todos con el mismo backend
+_breaker = _CircuitBreaker()
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 
 class BackendClient:
     """
     Cliente HTTP para comunicar Edge API con Backend Spring Boot.
     Envía datos de forma asíncrona para no bloquear el Edge API.
+
+    Usa el httpx.AsyncClient compartido del proceso (keep-alive entre
+    llamadas); el timeout se aplica por request.
     """
 
-    def __init__(self, backend_url: str, timeout: float = 10.0):
+    def __init__(
+            self,
+            backend_url: str,
+            timeout: float = 10.0,
+            client: Optional[httpx.AsyncClient] = None
+    ):
         self.backend_url = backend_url.rstrip('/')
         self.timeout = timeout
-        self.client = None
+        self.client = client if client is not None else get_http_client()
+
+        # URLs precalculadas una vez; las rutas por cubículo quedan como
+        # plantillas para no re-armar el prefijo en cada request
+        self._slot_status_url = self.backend_url + "/api/v1/cubicles/{}/availability-slot/status"
+        self._batch_status_url = f"{self.backend_url}/api/v1/cubicles/availability-slot/statuses"
+        self._booking_url = self.backend_url + "/api/v1/bookings/cubicle/{}/current"
+        self._health_url = f"{self.backend_url}/actuator/health"
 
-    async def __aenter__(self):
-        self.client = httpx.AsyncClient(timeout=self.timeout)
-        return self
+    async def _request_with_retry(self, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """
+        Ejecuta un request con reintentos (backoff exponencial + jitter)
+        ante errores transitorios; respeta el circuit breaker compartido.
+
+        Devuelve None si el breaker está abierto o se agotaron los intentos.
+        """
+        if not _breaker.allow():
+            logger.warning(f"Circuit breaker open, skipping {method} {url}")
+            return None
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.client:
-            await self.client.aclose()
+        # Serializar con orjson en vez del json.dumps de httpx
+        if "json" in kwargs:
+            kwargs["content"] = orjson.dumps(kwargs.pop("json"))
+            kwargs["headers"] = _JSON_HEADERS
+
+        last_error: Optional[Exception] = None
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                response = await self.client.request(method, url, timeout=self.timeout, **kwargs)
+                _breaker.record_success()
+                return response
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = e
+                if attempt < RETRY_ATTEMPTS - 1:
+                    # Jitter completo: evita que reintentos concurrentes
+                    # golpeen al backend en sincronía
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+                    await asyncio.sleep(delay)
+
+        _breaker.record_failure()
+        logger.error(f"{method} {url} failed after {RETRY_ATTEMPTS} attempts: {str(last_error)}")
+        return None
 
     async def update_availability_slot_status(
             self,
@@ -38,18 +135,18 @@ class BackendClient:
                 "status": status
             }
 
-            url = f"{self.backend_url}/api/v1/cubicles/{cubicle_id}/availability-slot/status"
+            url = self._slot_status_url.format(cubicle_id)
 
-            logger.info(f"Updating availability slot status in backend: {url}")
+            logger.debug("Updating availability slot status in backend: %s", url)
             logger.debug(f"Payload: {payload}")
 
-            if not self.client:
-                self.client = httpx.AsyncClient(timeout=self.timeout)
+            response = await self._request_with_retry("PATCH", url, json=payload)
 
-            response = await self.client.patch(url, json=payload)
+            if response is None:
+                return False
 
             if response.status_code in [200, 201]:
-                logger.info(f"Successfully updated availability slot status for cubicle {cubicle_id} to {status}")
+                logger.debug("Successfully updated availability slot status for cubicle %s to %s", cubicle_id, status)
                 return True
             else:
                 logger.warning(
@@ -57,14 +154,53 @@ class BackendClient:
                 )
                 return False
 
-        except httpx.TimeoutException:
-            logger.error(f"Timeout updating availability slot status for cubicle {cubicle_id}")
+        except Exception as e:
+            logger.error(f"Unexpected error updating availability slot status for cubicle {cubicle_id}: {str(e)}")
             return False
-        except httpx.RequestError as e:
-            logger.error(f"Request error updating availability slot status for cubicle {cubicle_id}: {str(e)}")
+
+    async def update_availability_slot_statuses_batch(self, updates: dict) -> Optional[bool]:
+        """
+        Actualiza el status de varios cubículos en un solo request.
+
+        Args:
+            updates: dict cubicle_id -> status backend (AVAILABLE/RESERVED)
+
+        Returns:
+            True si el batch se aplicó, False ante error transitorio,
+            None si el backend no expone el endpoint batch (404/405).
+        """
+        try:
+            payload = {
+                "updates": [
+                    {"cubicleId": cubicle_id, "status": status}
+                    for cubicle_id, status in updates.items()
+                ]
+            }
+
+            url = self._batch_status_url
+
+            logger.debug("Batch updating %s availability slot statuses in backend", len(updates))
+
+            response = await self._request_with_retry("PATCH", url, json=payload)
+
+            if response is None:
+                return False
+
+            if response.status_code in [200, 201]:
+                logger.debug("Successfully batch updated %s availability slot statuses", len(updates))
+                return True
+
+            if response.status_code in [404, 405]:
+                # Backend sin soporte batch: el caller cae a updates por ítem
+                return None
+
+            logger.warning(
+                f"Backend returned status {response.status_code} for batch update: {response.text}"
+            )
             return False
+
         except Exception as e:
-            logger.error(f"Unexpected error updating availability slot status for cubicle {cubicle_id}: {str(e)}")
+            logger.error(f"Unexpected error batch updating availability slot statuses: {str(e)}")
             return False
 
     async def cancel_current_booking(
@@ -87,7 +223,7 @@ class BackendClient:
         """
         try:
             # Construir URL con parámetros opcionales
-            url = f"{self.backend_url}/api/v1/bookings/cubicle/{cubicle_id}/current"
+            url = self._booking_url.format(cubicle_id)
 
             params = {}
             if date:
@@ -95,18 +231,18 @@ class BackendClient:
             if time:
                 params['time'] = time
 
-            logger.info(f"Cancelling current booking for cubicle {cubicle_id} (date: {date}, time: {time})")
+            logger.debug("Cancelling current booking for cubicle %s (date: %s, time: %s)", cubicle_id, date, time)
 
-            if not self.client:
-                self.client = httpx.AsyncClient(timeout=self.timeout)
+            response = await self._request_with_retry("DELETE", url, params=params)
 
-            response = await self.client.delete(url, params=params)
+            if response is None:
+                return False
 
             if response.status_code == 200:
-                logger.info(f"✓ Successfully cancelled current booking for cubicle {cubicle_id}")
+                logger.debug("Successfully cancelled current booking for cubicle %s", cubicle_id)
                 return True
             elif response.status_code == 404:
-                logger.info(f"✓ No active booking found for cubicle {cubicle_id} (already available)")
+                logger.debug("No active booking found for cubicle %s (already available)", cubicle_id)
                 return True  # No hay booking activo, es válido
             else:
                 logger.warning(
@@ -114,12 +250,6 @@ class BackendClient:
                 )
                 return False
 
-        except httpx.TimeoutException:
-            logger.error(f"Timeout cancelling booking for cubicle {cubicle_id}")
-            return False
-        except httpx.RequestError as e:
-            logger.error(f"Request error cancelling booking for cubicle {cubicle_id}: {str(e)}")
-            return False
         except Exception as e:
             logger.error(f"Unexpected error cancelling booking for cubicle {cubicle_id}: {str(e)}")
             return False
@@ -129,12 +259,7 @@ class BackendClient:
         Verifica si el backend está disponible.
         """
         try:
-            url = f"{self.backend_url}/actuator/health"
-
-            if not self.client:
-                self.client = httpx.AsyncClient(timeout=5.0)
-
-            response = await self.client.get(url)
+            response = await self.client.get(self._health_url, timeout=5.0)
             return response.status_code == 200
 
         except Exception as e:
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from domain.model.valueobjects.device_status import DeviceStatus
+from infrastructure.http.backend_client import BackendClient
+
+logger = logging.getLogger(__name__)
+
+# Zona horaria de Lima/Perú (UTC-5)
+LIMA_TZ = timezone(timedelta(hours=-5))
+
+# Sentinel para detener el worker de forma ordenada
+_STOP = object()
+
+# Map Edge API status to Backend booking status, precomputed once.
+# Edge API: available, occupied, offline, error
+# Backend: AVAILABLE, RESERVED (only 2 states)
+_EDGE_TO_BACKEND = {
+    DeviceStatus.AVAILABLE: "AVAILABLE",
+    DeviceStatus.OCCUPIED: "RESERVED",
+    DeviceStatus.OFFLINE: "AVAILABLE",
+    DeviceStatus.ERROR: "AVAILABLE"
+}
+
+
+def map_status_to_backend(status: DeviceStatus) -> str:
+    """Backend booking status that an edge status maps to"""
+    return _EDGE_TO_BACKEND.get(status, "AVAILABLE")
+
+
+class BackendSyncWorker:
+    """
+    Background worker que sincroniza estados de cubículos con el backend.
+
+    En lugar de un asyncio.create_task (y un BackendClient nuevo) por cada
+    lectura de sensor, los updates entran a una cola acotada y un único
+    worker los drena coaleciendo por cubicle_id: en una ráfaga de lecturas
+    del mismo cubículo sólo el último estado viaja al backend, sobre un
+    cliente HTTP persistente.
+    """
+
+    def __init__(
+            self,
+            backend_url: str,
+            flush_interval: float = 0.1,
+            max_queue_size: int = 10_000
+    ):
+        self._backend_url = backend_url
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._client: Optional[BackendClient] = None
+        self._task: Optional[asyncio.Task] = None
+        # Backpressure for the HTTP fan-out: a slow backend can only hold
+        # this many in-flight syncs before the flusher waits
+        self._sync_sem = asyncio.Semaphore(16)
+        self._bg_tasks: set = set()
+        # Se apaga si el backend responde 404/405 al endpoint batch
+        self._batch_supported = True
+
+    @property
+    def client(self) -> Optional[BackendClient]:
+        """Long-lived backend client shared by everything that talks HTTP"""
+        return self._client
+
+    async def start(self):
+        """Create the backend client and start the consumer task"""
+        self._client = BackendClient(self._backend_url)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Backend sync worker started")
+
+    async def stop(self):
+        """Drain pending updates and release the backend client"""
+        if self._task:
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+
+        # Wait for in-flight syncs so nothing is dropped on shutdown
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+
+        # The underlying httpx client is process-wide and closed from the
+        # app lifespan, not here
+        self._client = None
+
+        logger.info("Backend sync worker stopped")
+
+    def enqueue(self, cubicle_id: int, status: DeviceStatus):
+        """Queue a cubicle status change for backend sync (non-blocking)"""
+        try:
+            self._queue.put_nowait((cubicle_id, status))
+        except asyncio.QueueFull:
+            logger.warning(
+                "Backend sync queue full, dropping update for cubicle %s", cubicle_id
+            )
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+
+            # Coalesce: espera una ventana corta y quédate con el último
+            # estado por cubículo antes de tocar la red
+            pending = {item[0]: item[1]}
+            await asyncio.sleep(self._flush_interval)
+
+            stop = False
+            while not self._queue.empty():
+                nxt = self._queue.get_nowait()
+                if nxt is _STOP:
+                    stop = True
+                    break
+                pending[nxt[0]] = nxt[1]
+
+            await self._flush(pending)
+
+            if stop:
+                return
+
+    async def _flush(self, pending: dict):
+        # Varios cubículos en la misma ventana: un solo PATCH batch en vez
+        # de N round-trips (si el backend lo soporta)
+        if self._batch_supported and len(pending) > 1:
+            task = asyncio.create_task(self._guarded_batch_sync(dict(pending)))
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+            return
+
+        # Fan out the coalesced updates concurrently, bounded by the
+        # semaphore, without stalling queue consumption on a slow backend
+        for cubicle_id, status in pending.items():
+            task = asyncio.create_task(self._guarded_sync(cubicle_id, status))
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+
+    async def _guarded_batch_sync(self, pending: dict):
+        async with self._sync_sem:
+            try:
+                await self._sync_batch(pending)
+            except Exception as e:
+                logger.error(
+                    f"Error batch syncing {len(pending)} cubicles to backend: {str(e)}",
+                    exc_info=True
+                )
+
+    async def _sync_batch(self, pending: dict):
+        """
+        Sync a batch of cubicle statuses in one request.
+        Las cancelaciones de booking siguen siendo por cubículo (son
+        condicionales al estado), pero los status viajan juntos.
+        """
+        available = [
+            cubicle_id for cubicle_id, status in pending.items()
+            if status is DeviceStatus.AVAILABLE
+        ]
+        if available:
+            now_lima = datetime.now(LIMA_TZ)
+            date_str = now_lima.strftime("%Y-%m-%d")
+            time_str = now_lima.strftime("%H:%M:%S")
+            await asyncio.gather(*(
+                self._client.cancel_current_booking(cubicle_id, date=date_str, time=time_str)
+                for cubicle_id in available
+            ))
+
+        updates = {
+            cubicle_id: _EDGE_TO_BACKEND.get(status, "AVAILABLE")
+            for cubicle_id, status in pending.items()
+        }
+        result = await self._client.update_availability_slot_statuses_batch(updates)
+
+        if result is None:
+            # Backend viejo sin endpoint batch: no insistir, reenviar por ítem
+            self._batch_supported = False
+            logger.warning(
+                "Backend batch status endpoint unavailable, falling back to per-cubicle sync"
+            )
+            await self._flush(pending)
+        elif result is False:
+            logger.warning(f"Batch sync of {len(pending)} cubicle statuses failed")
+
+    async def _guarded_sync(self, cubicle_id: int, status: DeviceStatus):
+        async with self._sync_sem:
+            try:
+                await self._sync_one(cubicle_id, status)
+            except Exception as e:
+                logger.error(
+                    f"Error syncing cubicle {cubicle_id} to backend: {str(e)}",
+                    exc_info=True
+                )
+
+    async def _sync_one(self, cubicle_id: int, status: DeviceStatus):
+        """
+        Sync one cubicle status with the backend.
+        Si el estado pasa a AVAILABLE, cancela el booking activo primero.
+        """
+        backend_status = _EDGE_TO_BACKEND.get(status, "AVAILABLE")
+
+        logger.debug(
+            "Syncing cubicle %s -> status %s -> %s", cubicle_id, status.value, backend_status
+        )
+
+        # IMPORTANTE: Si el estado cambió a AVAILABLE, cancelar el booking activo
+        if status is DeviceStatus.AVAILABLE:
+            logger.debug("Cubicle %s is now AVAILABLE. Cancelling active booking...", cubicle_id)
+
+            now_lima = datetime.now(LIMA_TZ)
+            date_str = now_lima.strftime("%Y-%m-%d")
+            time_str = now_lima.strftime("%H:%M:%S")
+
+            cancel_success = await self._client.cancel_current_booking(
+                cubicle_id,
+                date=date_str,
+                time=time_str
+            )
+
+            if cancel_success:
+                logger.debug("Booking cancelled successfully for cubicle %s", cubicle_id)
+            else:
+                logger.warning(
+                    f"⚠ Could not cancel booking for cubicle {cubicle_id} (might be already available)")
+
+        success = await self._client.update_availability_slot_status(cubicle_id, backend_status)
+
+        if success:
+            logger.debug(
+                "Successfully synced availability slot status for cubicle %s to %s",
+                cubicle_id, backend_status)
+        else:
+            logger.warning(f"⚠ Failed to sync availability slot status for cubicle {cubicle_id}")
+
+# Singleton del worker, configurado desde main.py (mismo patrón que set_backend_url)
+_sync_worker: Optional[BackendSyncWorker] = None
+
+
+async def start_sync_worker(backend_url: str) -> BackendSyncWorker:
+    """Create and start the process-wide sync worker"""
+    global _sync_worker
+    _sync_worker = BackendSyncWorker(backend_url)
+    await _sync_worker.start()
+    return _sync_worker
+
+
+async def stop_sync_worker():
+    """Stop the process-wide sync worker if running"""
+    global _sync_worker
+    if _sync_worker:
+        await _sync_worker.stop()
+        _sync_worker = None
+
+
+def get_sync_worker() -> Optional[BackendSyncWorker]:
+    """Current process-wide sync worker (None if not started)"""
+    return _sync_worker
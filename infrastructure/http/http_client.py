@@ -0,0 +1,49 @@
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Connection pool sizing for the single backend host we talk to
+DEFAULT_TIMEOUT = 10.0
+MAX_KEEPALIVE_CONNECTIONS = 20
+MAX_CONNECTIONS = 100
+KEEPALIVE_EXPIRY = 60.0
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Process-wide httpx.AsyncClient, created lazily on first use.
+
+    One shared client means keep-alive connections are reused across all
+    backend calls instead of paying DNS + TCP + TLS setup per request.
+    Closed from the FastAPI lifespan on shutdown.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            # HTTP/2 multiplexes all backend calls over one TCP+TLS
+            # connection; httpx falls back to HTTP/1.1 automatically if
+            # the backend does not negotiate h2
+            http2=True,
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info("Shared HTTP client created")
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (called on application shutdown)"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Shared HTTP client closed")
+    _client = None
@@ -1,15 +1,15 @@
 import enum
+from typing import Optional
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, Enum as SQLEnum
-from sqlalchemy.sql import func
-from datetime import datetime, timezone, timedelta
+from sqlalchemy import String, Integer, Float, DateTime, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, timezone
 from infrastructure.persistence.configuration.database_configuration import Base
 
 
-LIMA_TZ = timezone(timedelta(hours=-5))
-
-def lima_now():
-    return datetime.now(timezone.utc).astimezone(LIMA_TZ)
+def utc_now():
+    """Internal timestamps are UTC; Lima formatting happens at the API edge"""
+    return datetime.now(timezone.utc)
 
 
 class DeviceStatusEnum(str, enum.Enum):
@@ -29,27 +29,62 @@ class DeviceModel(Base):
     """SQLAlchemy model for Device persistence"""
 
     __tablename__ = "devices"
-
-    id = Column(String(100), primary_key=True, index=True)
-    type = Column(SQLEnum(DeviceTypeEnum), nullable=False)
-    status = Column(SQLEnum(DeviceStatusEnum), nullable=False, default=DeviceStatusEnum.OFFLINE)
+    __table_args__ = (
+        # Branch-filtered dashboard queries (available/occupied per branch)
+        Index("ix_devices_branch_status", "branch_id", "status"),
+        # The "free seats per branch" query dominates dashboard traffic;
+        # a partial index keeps it small and hot in cache
+        Index(
+            "ix_devices_branch_available",
+            "branch_id",
+            postgresql_where=text("status = 'available'")
+        ),
+        Index("ix_devices_status", "status"),
+        # Partial index for the offline sweep: only rows that can still
+        # transition (status <> offline) are indexed by staleness
+        Index(
+            "ix_devices_active_last_update",
+            "last_update",
+            postgresql_where=text("status <> 'offline'")
+        ),
+        # One device per cubicle, enforced by the DB so concurrent assigns
+        # cannot race; unassigned devices (NULL) are excluded
+        Index(
+            "ux_devices_cubicle",
+            "cubicle_id",
+            unique=True,
+            postgresql_where=text("cubicle_id IS NOT NULL")
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String(100), primary_key=True, index=True)
+    # Stored as plain varchar: filters compare strings without Postgres
+    # enum casts and new values never need a type migration
+    type: Mapped[str] = mapped_column(String(16), nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default=DeviceStatusEnum.OFFLINE.value
+    )
 
     # Location
-    branch_id = Column(String(100), nullable=False)
-    zone = Column(String(100), nullable=False)
-    position = Column(String(100), nullable=False)
+    branch_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    zone: Mapped[str] = mapped_column(String(100), nullable=False)
+    position: Mapped[str] = mapped_column(String(100), nullable=False)
 
     # Cubicle ID (nullable - can be assigned later)
-    cubicle_id = Column(Integer, nullable=True, index=True)
+    cubicle_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
 
     # Last reading
-    last_pressure = Column(Float, nullable=True)
-    last_pressure_unit = Column(String(10), default="%")
-    last_pressure_timestamp = Column(DateTime, nullable=True)
+    last_pressure: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    last_pressure_unit: Mapped[Optional[str]] = mapped_column(String(10), default="%")
+    last_pressure_timestamp: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     # Timestamps
-    last_update = Column(DateTime(timezone=True), nullable=False, default=lima_now, onupdate=lima_now)
-    created_at = Column(DateTime(timezone=True), nullable=False, default=lima_now)
+    last_update: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=utc_now, onupdate=utc_now
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=utc_now
+    )
 
     def __repr__(self):
-        return f"<Device(id='{self.id}', type='{self.type}', status='{self.status}', cubicle_id={self.cubicle_id})>"
\ No newline at end of file
+        return f"<Device(id='{self.id}', type='{self.type}', status='{self.status}', cubicle_id={self.cubicle_id})>"
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from domain.model.aggregates.device import Device, DeviceId, DeviceStatus, DeviceSummary
+from domain.repository.device_repository import DeviceRepository
+
+# Cache tuning: one entry per physical sensor, refreshed at sensor cadence
+CACHE_TTL_SECONDS = 30.0
+CACHE_MAX_SIZE = 10_000
+
+
+class CachingDeviceRepository(DeviceRepository):
+    """
+    Read-through TTL cache decorator over another DeviceRepository.
+
+    Hot paths (update_device_reading, register_device) read the same device
+    over and over; caching find_by_id/exists turns those repeated SELECTs
+    into dict lookups. The store is class-level because repository instances
+    are created per request.
+
+    Writes sólo INVALIDAN su clave, nunca la pueblan: los métodos de
+    escritura corren antes del commit de get_db_session, y si ese commit
+    falla un entry escrito aquí serviría estado que nunca se persistió a
+    todos los requests del proceso. El próximo find_by_id repuebla desde
+    la base ya comiteada.
+    """
+
+    # Shared across instances: repositories are built per request
+    _cache: Dict[str, Tuple[float, Device]] = {}
+    _locks: Dict[str, asyncio.Lock] = {}
+
+    def __init__(self, repository: DeviceRepository, ttl: float = CACHE_TTL_SECONDS):
+        self._repository = repository
+        self._ttl = ttl
+
+    def _get_cached(self, key: str) -> Optional[Device]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        expires_at, device = entry
+        if time.monotonic() >= expires_at:
+            self._cache.pop(key, None)
+            return None
+
+        return device
+
+    def _store(self, device: Device):
+        if len(self._cache) >= CACHE_MAX_SIZE:
+            self._purge_expired()
+        self._cache[device.id.value] = (time.monotonic() + self._ttl, device)
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._cache.items() if now >= expires_at]
+        for key in expired:
+            self._cache.pop(key, None)
+
+    def _evict(self, key: str):
+        self._cache.pop(key, None)
+
+    async def save(self, device: Device) -> Device:
+        saved_device = await self._repository.save(device)
+        self._evict(device.id.value)
+        return saved_device
+
+    async def update_reading_atomic(
+            self,
+            device_id: DeviceId,
+            pressure: float,
+            threshold: float,
+            now: datetime
+    ) -> Tuple[Optional[Device], Optional[DeviceStatus]]:
+        device, previous_status = await self._repository.update_reading_atomic(
+            device_id, pressure, threshold, now
+        )
+        self._evict(device_id.value)
+        return device, previous_status
+
+    async def update_readings_batch(
+            self,
+            readings: List[Tuple[DeviceId, float, float]],
+            now: datetime
+    ) -> List[Tuple[Device, DeviceStatus]]:
+        updated = await self._repository.update_readings_batch(readings, now)
+        for device_id, _, _ in readings:
+            self._evict(device_id.value)
+        return updated
+
+    async def find_by_id(self, device_id: DeviceId) -> Optional[Device]:
+        cached = self._get_cached(device_id.value)
+        if cached is not None:
+            return cached
+
+        # Per-key lock so concurrent misses issue a single SELECT
+        lock = self._locks.setdefault(device_id.value, asyncio.Lock())
+        async with lock:
+            cached = self._get_cached(device_id.value)
+            if cached is not None:
+                return cached
+
+            device = await self._repository.find_by_id(device_id)
+            if device is not None:
+                self._store(device)
+            return device
+
+    async def find_all(self) -> List[Device]:
+        return await self._repository.find_all()
+
+    async def stream_all(self) -> AsyncIterator[Device]:
+        async for device in self._repository.stream_all():
+            yield device
+
+    async def find_by_branch(self, branch_id: str) -> List[Device]:
+        return await self._repository.find_by_branch(branch_id)
+
+    async def find_by_status(self, status: DeviceStatus) -> List[Device]:
+        return await self._repository.find_by_status(status)
+
+    async def find_by_branch_and_status(self, branch_id: str, status: DeviceStatus) -> List[Device]:
+        return await self._repository.find_by_branch_and_status(branch_id, status)
+
+    async def find_summaries_by_branch(
+            self,
+            branch_id: str,
+            status: Optional[DeviceStatus] = None
+    ) -> List[DeviceSummary]:
+        return await self._repository.find_summaries_by_branch(branch_id, status)
+
+    async def sweep_offline(self, cutoff: datetime, now: datetime) -> List[Device]:
+        devices = await self._repository.sweep_offline(cutoff, now)
+        # Bulk status change bypasses save(); drop the affected entries
+        for device in devices:
+            self._evict(device.id.value)
+        return devices
+
+    async def delete(self, device_id: DeviceId) -> bool:
+        self._evict(device_id.value)
+        self._locks.pop(device_id.value, None)
+        return await self._repository.delete(device_id)
+
+    async def exists(self, device_id: DeviceId) -> bool:
+        if self._get_cached(device_id.value) is not None:
+            return True
+        return await self._repository.exists(device_id)
+
+    async def find_by_cubicle_id(self, cubicle_id: int) -> Optional[Device]:
+        return await self._repository.find_by_cubicle_id(cubicle_id)
+
+    async def assign_cubicle_atomic(
+            self,
+            device_id: DeviceId,
+            cubicle_id: int,
+            now: datetime
+    ) -> Optional[Device]:
+        device = await self._repository.assign_cubicle_atomic(device_id, cubicle_id, now)
+        self._evict(device_id.value)
+        return device
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from domain.model.aggregates.device import Device, DeviceId, DeviceStatus, DeviceSummary
+from domain.repository.device_repository import DeviceRepository
+
+
+class InMemoryDeviceRepository(DeviceRepository):
+    """
+    In-memory implementation for local development and demos (no PostgreSQL).
+
+    Branch and status lookups hit secondary indexes (dict of id sets) kept
+    coherent on every write, so dashboard-refresh queries are O(k) on the
+    result size instead of scanning every device.
+    """
+
+    def __init__(self):
+        self._devices: Dict[str, Device] = {}
+        self._by_branch: Dict[str, Set[str]] = defaultdict(set)
+        self._by_status: Dict[DeviceStatus, Set[str]] = defaultdict(set)
+
+    def _index(self, device: Device):
+        self._by_branch[device.location.branch_id].add(device.id.value)
+        self._by_status[device.status].add(device.id.value)
+
+    def _unindex(self, device: Device):
+        self._by_branch[device.location.branch_id].discard(device.id.value)
+        self._by_status[device.status].discard(device.id.value)
+
+    async def save(self, device: Device) -> Device:
+        existing = self._devices.get(device.id.value)
+        if existing is not None:
+            self._unindex(existing)
+
+        self._devices[device.id.value] = device
+        self._index(device)
+        return device
+
+    async def update_reading_atomic(
+            self,
+            device_id: DeviceId,
+            pressure: float,
+            threshold: float,
+            now: datetime
+    ) -> Tuple[Optional[Device], Optional[DeviceStatus]]:
+        device = self._devices.get(device_id.value)
+        if device is None:
+            return None, None
+
+        previous_status = device.status
+
+        self._unindex(device)
+        device.last_reading_value = pressure
+        device.last_reading_ts = now
+        device.last_update = now
+        device.status = (
+            DeviceStatus.OCCUPIED if pressure >= threshold
+            else DeviceStatus.AVAILABLE
+        )
+        self._index(device)
+
+        return device, previous_status
+
+    async def update_readings_batch(
+            self,
+            readings: List[Tuple[DeviceId, float, float]],
+            now: datetime
+    ) -> List[Tuple[Device, DeviceStatus]]:
+        updated = []
+        for device_id, pressure, threshold in readings:
+            device, previous_status = await self.update_reading_atomic(
+                device_id, pressure, threshold, now
+            )
+            if device is not None:
+                updated.append((device, previous_status))
+        return updated
+
+    async def find_by_id(self, device_id: DeviceId) -> Optional[Device]:
+        return self._devices.get(device_id.value)
+
+    async def find_all(self) -> List[Device]:
+        return list(self._devices.values())
+
+    async def stream_all(self) -> AsyncIterator[Device]:
+        for device in list(self._devices.values()):
+            yield device
+
+    async def find_by_branch(self, branch_id: str) -> List[Device]:
+        return [self._devices[i] for i in self._by_branch.get(branch_id, ())]
+
+    async def find_by_status(self, status: DeviceStatus) -> List[Device]:
+        return [self._devices[i] for i in self._by_status.get(status, ())]
+
+    async def find_by_branch_and_status(self, branch_id: str, status: DeviceStatus) -> List[Device]:
+        in_branch = self._by_branch.get(branch_id, set())
+        in_status = self._by_status.get(status, set())
+        return [self._devices[i] for i in in_branch & in_status]
+
+    async def find_summaries_by_branch(
+            self,
+            branch_id: str,
+            status: Optional[DeviceStatus] = None
+    ) -> List[DeviceSummary]:
+        ids = self._by_branch.get(branch_id, set())
+        if status is not None:
+            ids = ids & self._by_status.get(status, set())
+
+        return [
+            DeviceSummary(
+                id=d.id.value,
+                status=d.status,
+                cubicle_id=d.cubicle_id,
+                zone=d.location.zone,
+                position=d.location.position
+            )
+            for d in (self._devices[i] for i in ids)
+        ]
+
+    async def sweep_offline(self, cutoff: datetime, now: datetime) -> List[Device]:
+        transitioned = []
+        for device in self._devices.values():
+            if device.status is DeviceStatus.OFFLINE or device.last_update >= cutoff:
+                continue
+
+            self._by_status[device.status].discard(device.id.value)
+            device.status = DeviceStatus.OFFLINE
+            device.last_update = now
+            self._by_status[DeviceStatus.OFFLINE].add(device.id.value)
+            transitioned.append(device)
+
+        return transitioned
+
+    async def delete(self, device_id: DeviceId) -> bool:
+        device = self._devices.pop(device_id.value, None)
+        if device is None:
+            return False
+
+        self._unindex(device)
+        return True
+
+    async def exists(self, device_id: DeviceId) -> bool:
+        return device_id.value in self._devices
+
+    async def find_by_cubicle_id(self, cubicle_id: int) -> Optional[Device]:
+        for device in self._devices.values():
+            if device.cubicle_id == cubicle_id:
+                return device
+        return None
+
+    async def assign_cubicle_atomic(
+            self,
+            device_id: DeviceId,
+            cubicle_id: int,
+            now: datetime
+    ) -> Optional[Device]:
+        device = self._devices.get(device_id.value)
+        if device is None:
+            return None
+
+        taken_by = await self.find_by_cubicle_id(cubicle_id)
+        if taken_by is not None and taken_by.id.value != device_id.value:
+            raise ValueError(f"Cubicle {cubicle_id} already has a device assigned")
+
+        device.cubicle_id = cubicle_id
+        device.last_update = now
+        return device
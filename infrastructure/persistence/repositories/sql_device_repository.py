@@ -1,33 +1,101 @@
-from typing import List, Optional
-from sqlalchemy import select, delete
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import Float, String, bindparam, column, select, update, delete, exists, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, UTC
 
-from domain.model.aggregates.device import Device, DeviceId, DeviceType, DeviceStatus, Location, PressureReading
+from domain.model.aggregates.device import Device, DeviceId, DeviceType, DeviceStatus, DeviceSummary, Location, \
+    READING_UNIT
 from domain.repository.device_repository import DeviceRepository
-from infrastructure.persistence.models.device_model import DeviceModel, DeviceStatusEnum, DeviceTypeEnum
+from infrastructure.persistence.configuration.database_configuration import current_session
+from infrastructure.persistence.models.device_model import DeviceModel
+
+# Precompiled value maps: plain dict lookups instead of Enum.__call__ on
+# every row read (columns store the raw string values)
+_DOMAIN_STATUS = {e.value: e for e in DeviceStatus}
+_DOMAIN_TYPE = {e.value: e for e in DeviceType}
+
+
+# Column tuple for read-only queries: selecting raw columns skips ORM
+# identity-map insertion and attribute instrumentation per row
+_COLS = (
+    DeviceModel.id,
+    DeviceModel.type,
+    DeviceModel.status,
+    DeviceModel.branch_id,
+    DeviceModel.zone,
+    DeviceModel.position,
+    DeviceModel.cubicle_id,
+    DeviceModel.last_pressure,
+    DeviceModel.last_pressure_timestamp,
+    DeviceModel.last_update,
+)
+
+
+# Statements calientes preconstruidos una vez a nivel de módulo: cada
+# request sólo paga el execute() con sus parámetros, no la reconstrucción
+# del AST de SQLAlchemy (el SQL compilado además vive en el query cache
+# del engine)
+_FIND_BY_ID_STMT = select(*_COLS).where(DeviceModel.id == bindparam("did"))
+
+_EXISTS_STMT = select(exists().where(DeviceModel.id == bindparam("did")))
+
+_PREV = DeviceModel.__table__.alias("prev")
+_UPDATE_READING_STMT = (
+    update(DeviceModel)
+    .where(
+        DeviceModel.id == bindparam("did"),
+        DeviceModel.id == _PREV.c.id
+    )
+    .values(
+        status=bindparam("new_status"),
+        last_pressure=bindparam("pressure"),
+        last_pressure_timestamp=bindparam("now"),
+        last_update=bindparam("now")
+    )
+    .returning(
+        DeviceModel.type,
+        DeviceModel.branch_id,
+        DeviceModel.zone,
+        DeviceModel.position,
+        DeviceModel.cubicle_id,
+        _PREV.c.status.label("previous_status")
+    )
+)
+
+
+def _row_to_entity(row) -> Device:
+    """Convert a raw column row (in _COLS order) to a domain entity"""
+    return Device(
+        id=DeviceId(row.id),
+        type=_DOMAIN_TYPE[row.type],
+        status=_DOMAIN_STATUS[row.status],
+        location=Location(
+            branch_id=row.branch_id,
+            zone=row.zone,
+            position=row.position
+        ),
+        last_reading_value=row.last_pressure,
+        last_reading_ts=row.last_pressure_timestamp,
+        last_update=row.last_update,
+        cubicle_id=row.cubicle_id
+    )
 
 
 def _model_to_entity(model: DeviceModel) -> Device:
     """Convert SQLAlchemy model to domain entity"""
-    last_reading = None
-    if model.last_pressure is not None:
-        last_reading = PressureReading(
-            value=model.last_pressure,
-            unit=model.last_pressure_unit,
-            timestamp=model.last_pressure_timestamp
-        )
-
     device = Device(
         id=DeviceId(model.id),
-        type=DeviceType(model.type.value),
-        status=DeviceStatus(model.status.value),
+        type=_DOMAIN_TYPE[model.type],
+        status=_DOMAIN_STATUS[model.status],
         location=Location(
             branch_id=model.branch_id,
             zone=model.zone,
             position=model.position
         ),
-        last_reading=last_reading,
+        last_reading_value=model.last_pressure,
+        last_reading_ts=model.last_pressure_timestamp,
         last_update=model.last_update,
         cubicle_id=model.cubicle_id
     )
@@ -38,116 +106,330 @@ def _model_to_entity(model: DeviceModel) -> Device:
 class SQLAlchemyDeviceRepository(DeviceRepository):
     """SQLAlchemy implementation for Device repository with PostgreSQL"""
 
-    def __init__(self, session: AsyncSession):
-        self._session = session
+    def __init__(self, session: Optional[AsyncSession] = None):
+        # Sin sesión explícita el repositorio puede vivir como singleton:
+        # cada llamada resuelve la sesión del request vía ContextVar
+        self._session_override = session
+
+    @property
+    def _session(self) -> AsyncSession:
+        if self._session_override is not None:
+            return self._session_override
+        return current_session.get()
 
     async def save(self, device: Device) -> Device:
-        """Save or update a device"""
+        """Save or update a device with a single UPSERT"""
+        payload = {
+            "id": device.id.value,
+            "type": device.type.value,
+            "status": device.status.value,
+            "branch_id": device.location.branch_id,
+            "zone": device.location.zone,
+            "position": device.location.position,
+            "cubicle_id": device.cubicle_id,
+            "last_update": device.last_update,
+            "created_at": datetime.now(UTC)
+        }
+
+        if device.last_reading_value is not None:
+            payload["last_pressure"] = device.last_reading_value
+            payload["last_pressure_unit"] = READING_UNIT
+            payload["last_pressure_timestamp"] = device.last_reading_ts
+
+        stmt = pg_insert(DeviceModel).values(**payload)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DeviceModel.id],
+            # created_at keeps its original value on conflict
+            set_={key: stmt.excluded[key] for key in payload if key not in ("id", "created_at")}
+        )
+
+        await self._session.execute(stmt)
+        await self._session.flush()
+        return device
+
+    async def update_reading_atomic(
+            self,
+            device_id: DeviceId,
+            pressure: float,
+            threshold: float,
+            now: datetime
+    ) -> Tuple[Optional[Device], Optional[DeviceStatus]]:
+        """Apply a sensor reading with a single UPDATE ... RETURNING.
+
+        Self-joins against the pre-update row so the previous status comes
+        back in the same round trip (RETURNING alone only sees new values).
+        """
+        new_status = (
+            DeviceStatus.OCCUPIED if pressure >= threshold
+            else DeviceStatus.AVAILABLE
+        )
+
         result = await self._session.execute(
-            select(DeviceModel).where(DeviceModel.id == device.id.value)
+            _UPDATE_READING_STMT,
+            {
+                "did": device_id.value,
+                "new_status": new_status.value,
+                "pressure": pressure,
+                "now": now
+            }
+        )
+        row = result.first()
+
+        if row is None:
+            return None, None
+
+        await self._session.flush()
+
+        device = Device(
+            id=device_id,
+            type=_DOMAIN_TYPE[row.type],
+            status=new_status,
+            location=Location(
+                branch_id=row.branch_id,
+                zone=row.zone,
+                position=row.position
+            ),
+            last_reading_value=pressure,
+            last_reading_ts=now,
+            last_update=now,
+            cubicle_id=row.cubicle_id
         )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            # Update existing
-            existing.type = DeviceTypeEnum(device.type.value)
-            existing.status = DeviceStatusEnum(device.status.value)
-            existing.branch_id = device.location.branch_id
-            existing.zone = device.location.zone
-            existing.position = device.location.position
-            existing.cubicle_id = device.cubicle_id
-
-            if device.last_reading:
-                existing.last_pressure = device.last_reading.value
-                existing.last_pressure_unit = device.last_reading.unit
-                existing.last_pressure_timestamp = device.last_reading.timestamp
-
-            existing.last_update = device.last_update
-        else:
-            # Create new
-            device_model = DeviceModel(
-                id=device.id.value,
-                type=DeviceTypeEnum(device.type.value),
-                status=DeviceStatusEnum(device.status.value),
-                branch_id=device.location.branch_id,
-                zone=device.location.zone,
-                position=device.location.position,
-                cubicle_id=device.cubicle_id,
-                last_update=device.last_update,
-                created_at=datetime.now(UTC)
+        return device, _DOMAIN_STATUS[row.previous_status]
+
+    async def update_readings_batch(
+            self,
+            readings: List[Tuple[DeviceId, float, float]],
+            now: datetime
+    ) -> List[Tuple[Device, DeviceStatus]]:
+        """Apply a burst of readings with one UPDATE ... FROM (VALUES ...).
+
+        Statuses are derived per item in Python and joined in as a values
+        list, so N readings cost a single round trip; the prev alias
+        returns each device's pre-update status like update_reading_atomic.
+        """
+        if not readings:
+            return []
+
+        rows = [
+            (
+                device_id.value,
+                pressure,
+                (DeviceStatus.OCCUPIED if pressure >= threshold
+                 else DeviceStatus.AVAILABLE).value
             )
+            for device_id, pressure, threshold in readings
+        ]
+
+        data = values(
+            column("id", String),
+            column("pressure", Float),
+            column("status", String),
+            name="incoming"
+        ).data(rows)
 
-            if device.last_reading:
-                device_model.last_pressure = device.last_reading.value
-                device_model.last_pressure_unit = device.last_reading.unit
-                device_model.last_pressure_timestamp = device.last_reading.timestamp
+        result = await self._session.execute(
+            update(DeviceModel)
+            .where(
+                DeviceModel.id == data.c.id,
+                DeviceModel.id == _PREV.c.id
+            )
+            .values(
+                status=data.c.status,
+                last_pressure=data.c.pressure,
+                last_pressure_timestamp=now,
+                last_update=now
+            )
+            .returning(
+                DeviceModel.id,
+                DeviceModel.type,
+                DeviceModel.branch_id,
+                DeviceModel.zone,
+                DeviceModel.position,
+                DeviceModel.cubicle_id,
+                data.c.pressure.label("pressure"),
+                data.c.status.label("new_status"),
+                _PREV.c.status.label("previous_status")
+            )
+        )
+        await self._session.flush()
 
-            self._session.add(device_model)
+        updated = []
+        for row in result.all():
+            device = Device(
+                id=DeviceId(row.id),
+                type=_DOMAIN_TYPE[row.type],
+                status=_DOMAIN_STATUS[row.new_status],
+                location=Location(
+                    branch_id=row.branch_id,
+                    zone=row.zone,
+                    position=row.position
+                ),
+                last_reading_value=row.pressure,
+                last_reading_ts=now,
+                last_update=now,
+                cubicle_id=row.cubicle_id
+            )
+            updated.append((device, _DOMAIN_STATUS[row.previous_status]))
 
-        await self._session.commit()
-        return device
+        return updated
 
     async def find_by_id(self, device_id: DeviceId) -> Optional[Device]:
         """Find device by ID"""
         result = await self._session.execute(
-            select(DeviceModel).where(DeviceModel.id == device_id.value)
+            _FIND_BY_ID_STMT, {"did": device_id.value}
         )
-        device_model = result.scalar_one_or_none()
+        row = result.first()
 
-        if not device_model:
+        if row is None:
             return None
 
-        return _model_to_entity(device_model)
+        return _row_to_entity(row)
 
     async def find_all(self) -> List[Device]:
         """Find all devices"""
-        result = await self._session.execute(select(DeviceModel))
-        device_models = result.scalars().all()
+        result = await self._session.execute(select(*_COLS))
 
-        return [_model_to_entity(dm) for dm in device_models]
+        return [_row_to_entity(row) for row in result.all()]
+
+    async def stream_all(self) -> AsyncIterator[Device]:
+        """Stream all devices in server-side chunks.
+
+        Keeps peak memory at the yield_per chunk size instead of the whole
+        fleet; the caller must finish iterating before the session closes.
+        """
+        result = await self._session.stream(
+            select(*_COLS).execution_options(yield_per=200)
+        )
+        async for row in result:
+            yield _row_to_entity(row)
 
     async def find_by_branch(self, branch_id: str) -> List[Device]:
         """Find all devices in a branch"""
         result = await self._session.execute(
-            select(DeviceModel).where(DeviceModel.branch_id == branch_id)
+            select(*_COLS).where(DeviceModel.branch_id == branch_id)
         )
-        device_models = result.scalars().all()
 
-        return [_model_to_entity(dm) for dm in device_models]
+        return [_row_to_entity(row) for row in result.all()]
 
     async def find_by_status(self, status: DeviceStatus) -> List[Device]:
         """Find devices by status"""
         result = await self._session.execute(
-            select(DeviceModel).where(DeviceModel.status == DeviceStatusEnum(status.value))
+            select(*_COLS).where(DeviceModel.status == status.value)
         )
-        device_models = result.scalars().all()
 
-        return [_model_to_entity(dm) for dm in device_models]
+        return [_row_to_entity(row) for row in result.all()]
+
+    async def find_by_branch_and_status(self, branch_id: str, status: DeviceStatus) -> List[Device]:
+        """Find devices in a branch filtered by status"""
+        result = await self._session.execute(
+            select(*_COLS).where(
+                DeviceModel.branch_id == branch_id,
+                DeviceModel.status == status.value
+            )
+        )
+
+        return [_row_to_entity(row) for row in result.all()]
 
     async def find_by_cubicle_id(self, cubicle_id: int) -> Optional[Device]:
         """Find device assigned to a cubicle"""
         result = await self._session.execute(
-            select(DeviceModel).where(DeviceModel.cubicle_id == cubicle_id)
+            select(*_COLS).where(DeviceModel.cubicle_id == cubicle_id)
         )
-        device_model = result.scalar_one_or_none()
+        row = result.first()
 
-        if not device_model:
+        if row is None:
             return None
 
-        return _model_to_entity(device_model)
+        return _row_to_entity(row)
+
+    async def find_summaries_by_branch(
+            self,
+            branch_id: str,
+            status: Optional[DeviceStatus] = None
+    ) -> List[DeviceSummary]:
+        """Find lightweight device summaries without hydrating full aggregates"""
+        stmt = select(
+            DeviceModel.id,
+            DeviceModel.status,
+            DeviceModel.cubicle_id,
+            DeviceModel.zone,
+            DeviceModel.position
+        ).where(DeviceModel.branch_id == branch_id)
+
+        if status is not None:
+            stmt = stmt.where(DeviceModel.status == status.value)
+
+        result = await self._session.execute(stmt)
+
+        return [
+            DeviceSummary(
+                id=row.id,
+                status=_DOMAIN_STATUS[row.status],
+                cubicle_id=row.cubicle_id,
+                zone=row.zone,
+                position=row.position
+            )
+            for row in result.all()
+        ]
+
+    async def sweep_offline(self, cutoff: datetime, now: datetime) -> List[Device]:
+        """Mark stale devices offline with a single UPDATE ... RETURNING"""
+        result = await self._session.execute(
+            update(DeviceModel)
+            .where(
+                DeviceModel.last_update < cutoff,
+                DeviceModel.status != DeviceStatus.OFFLINE.value
+            )
+            .values(status=DeviceStatus.OFFLINE.value, last_update=now)
+            .returning(DeviceModel)
+        )
+        device_models = result.scalars().all()
+        await self._session.flush()
+
+        return [_model_to_entity(dm) for dm in device_models]
+
+    async def assign_cubicle_atomic(
+            self,
+            device_id: DeviceId,
+            cubicle_id: int,
+            now: datetime
+    ) -> Optional[Device]:
+        """Assign a device to a cubicle with a single UPDATE.
+
+        Uniqueness is enforced by the partial unique index on cubicle_id,
+        so concurrent assignments cannot race.
+        """
+        try:
+            result = await self._session.execute(
+                update(DeviceModel)
+                .where(DeviceModel.id == device_id.value)
+                .values(cubicle_id=cubicle_id, last_update=now)
+                .returning(DeviceModel)
+            )
+            model = result.scalar_one_or_none()
+
+            if model is None:
+                return None
+
+            await self._session.flush()
+        except IntegrityError:
+            await self._session.rollback()
+            raise ValueError(f"Cubicle {cubicle_id} already has a device assigned")
+
+        return _model_to_entity(model)
 
     async def delete(self, device_id: DeviceId) -> bool:
         """Delete a device"""
         result = await self._session.execute(
             delete(DeviceModel).where(DeviceModel.id == device_id.value)
         )
-        await self._session.commit()
+        await self._session.flush()
         return result.rowcount > 0
 
     async def exists(self, device_id: DeviceId) -> bool:
         """Check if device exists"""
         result = await self._session.execute(
-            select(DeviceModel.id).where(DeviceModel.id == device_id.value)
+            _EXISTS_STMT, {"did": device_id.value}
         )
-        return result.scalar_one_or_none() is not None
+        return bool(result.scalar())
 
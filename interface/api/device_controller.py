@@ -1,18 +1,28 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from application.device_service import DeviceService
+from domain.model.valueobjects.device_status import DeviceStatus
 from infrastructure.persistence.configuration.database_configuration import get_db_session
+from infrastructure.persistence.repositories.caching_device_repository import CachingDeviceRepository
 from infrastructure.persistence.repositories.sql_device_repository import SQLAlchemyDeviceRepository
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
 # DTOs (Data Transfer Objects)
-class RegisterDeviceRequest(BaseModel):
+# Inmutables y sin campos extra: valida una vez, nada de re-parseo
+class _DTOBase(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
+
+class RegisterDeviceRequest(_DTOBase):
     device_id: str = Field(..., min_length=3, description="Unique device identifier")
     device_type: str = Field(..., description="Type of device (chair_sensor, table_sensor, environmental)")
     branch_id: str = Field(..., description="Branch ID where device is located")
@@ -20,16 +30,39 @@ class RegisterDeviceRequest(BaseModel):
     position: str = Field(..., description="Specific position identifier")
 
 
-class UpdateReadingRequest(BaseModel):
+class UpdateReadingRequest(_DTOBase):
+    pressure: float = Field(..., ge=0, le=100, description="Pressure reading (0-100%)")
+    threshold: Optional[float] = Field(30.0, ge=0, le=100, description="Threshold for occupied status")
+
+
+# Validador precompilado para el endpoint de mayor QPS: se salta el
+# dispatch de dependencias de FastAPI y valida el body directo
+_reading_adapter = TypeAdapter(UpdateReadingRequest)
+
+
+class BatchReadingItem(_DTOBase):
+    device_id: str = Field(..., min_length=3, description="Device identifier")
     pressure: float = Field(..., ge=0, le=100, description="Pressure reading (0-100%)")
     threshold: Optional[float] = Field(30.0, ge=0, le=100, description="Threshold for occupied status")
 
 
-class AssignCubicleRequest(BaseModel):
+class BatchReadingsRequest(_DTOBase):
+    readings: List[BatchReadingItem] = Field(..., min_length=1)
+
+
+class AssignCubicleRequest(_DTOBase):
     cubicle_id: int = Field(..., gt=0, description="Cubicle ID to assign device to")
 
 
-class DeviceResponse(BaseModel):
+class DeviceSummaryResponse(_DTOBase):
+    id: str
+    status: str
+    cubicle_id: Optional[int]
+    zone: str
+    position: str
+
+
+class DeviceResponse(_DTOBase):
     id: str
     type: str
     status: str
@@ -39,7 +72,7 @@ class DeviceResponse(BaseModel):
     last_update: str
 
 
-class HealthResponse(BaseModel):
+class HealthResponse(_DTOBase):
     edge_api: str
     backend: str
     backend_reachable: bool
@@ -47,34 +80,55 @@ class HealthResponse(BaseModel):
 
 # Dependency Injection
 _backend_url: Optional[str] = None
+_service: Optional[DeviceService] = None
 
 
 def set_backend_url(url: str):
     """Configure backend URL for service"""
-    global _backend_url
+    global _backend_url, _service
     _backend_url = url
+    _service = None
     logger.info(f"Backend URL configured: {url}")
 
 
 async def get_device_service(
         db_session: AsyncSession = Depends(get_db_session)
 ) -> DeviceService:
-    """Dependency to get device service with database session"""
-    if _backend_url is None:
-        raise HTTPException(
-            status_code=500,
-            detail="Device service not initialized. Backend URL not configured."
+    """Dependency to get the device service.
+
+    Servicio y repositorios son stateless, así que se construyen una sola
+    vez; lo único per-request es la sesión, que get_db_session deja en el
+    ContextVar del task.
+    """
+    global _service
+    if _service is None:
+        if _backend_url is None:
+            raise HTTPException(
+                status_code=500,
+                detail="Device service not initialized. Backend URL not configured."
+            )
+        _service = DeviceService(
+            CachingDeviceRepository(SQLAlchemyDeviceRepository()),
+            backend_url=_backend_url
         )
+    return _service
 
-    repository = SQLAlchemyDeviceRepository(db_session)
-    return DeviceService(repository, backend_url=_backend_url)
+
+# Probe de salud del backend cacheado: los health checks del balanceador
+# llegan cada segundo y no deben costar un round-trip a Azure cada vez.
+# Un fallo se recuerda más tiempo que un éxito (circuit abierto).
+_HEALTH_TTL_OK = 5.0
+_HEALTH_TTL_FAIL = 10.0
+_HEALTH_PROBE_TIMEOUT = 1.0
+_health_cache = {"ts": 0.0, "ok": False, "ttl": 0.0}
+_health_lock = asyncio.Lock()
 
 
 # Router
 router = APIRouter(prefix="/api/v1/devices", tags=["IoT Device Monitoring"])
 
 
-@router.post("/register", response_model=DeviceResponse, status_code=201)
+@router.post("/register", status_code=201, responses={201: {"model": DeviceResponse}})
 async def register_device(
         request: RegisterDeviceRequest,
         service: DeviceService = Depends(get_device_service)
@@ -84,7 +138,7 @@ async def register_device(
     Device stored in PostgreSQL.
     """
     try:
-        logger.info(f"Registering device: {request.device_id}")
+        logger.debug("Registering device: %s", request.device_id)
 
         device = await service.register_device(
             device_id=request.device_id,
@@ -94,8 +148,8 @@ async def register_device(
             position=request.position
         )
 
-        logger.info(f"Device {request.device_id} registered successfully")
-        return DeviceResponse(**device.to_dict())
+        logger.debug("Device %s registered successfully", request.device_id)
+        return ORJSONResponse(device.to_dict(), status_code=201)
 
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -105,27 +159,50 @@ async def register_device(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/{device_id}/readings", response_model=DeviceResponse)
+@router.post(
+    "/{device_id}/readings",
+    responses={200: {"model": DeviceResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": UpdateReadingRequest.model_json_schema()}
+            }
+        }
+    }
+)
 async def update_device_reading(
         device_id: str,
-        request: UpdateReadingRequest,
+        request: Request,
         service: DeviceService = Depends(get_device_service)
 ):
     """
     Update device reading from ESP32.
     Data stored in PostgreSQL and synced to backend.
     """
+    # Body parseado con el TypeAdapter precompilado (ruta más caliente)
+    try:
+        reading = _reading_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        # Sin include_input: en un body que ni siquiera es JSON el input
+        # son los bytes crudos, que el JSONResponse de los errores HTTP
+        # no puede serializar (500 en vez de 422)
+        raise HTTPException(
+            status_code=422,
+            detail=e.errors(include_url=False, include_input=False)
+        )
+
     try:
-        logger.info(f"Updating reading for device {device_id}: {request.pressure}%")
+        logger.debug("Updating reading for device %s: %s%%", device_id, reading.pressure)
 
         device = await service.update_device_reading(
             device_id=device_id,
-            pressure=request.pressure,
-            threshold=request.threshold
+            pressure=reading.pressure,
+            threshold=reading.threshold
         )
 
-        logger.info(f"Reading updated for {device_id}: Status={device.status.value}")
-        return DeviceResponse(**device.to_dict())
+        logger.debug("Reading updated for %s: Status=%s", device_id, device.status.value)
+        return ORJSONResponse(device.to_dict())
 
     except ValueError as e:
         logger.error(f"Device not found: {str(e)}")
@@ -135,7 +212,30 @@ async def update_device_reading(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.patch("/{device_id}/assign-cubicle", response_model=DeviceResponse)
+@router.post("/readings/batch", responses={200: {"model": List[DeviceResponse]}})
+async def update_device_readings_batch(
+        request: BatchReadingsRequest,
+        service: DeviceService = Depends(get_device_service)
+):
+    """
+    Apply a burst of sensor readings in one request.
+    N lecturas cuestan un solo UPDATE en PostgreSQL y un sync batch.
+    """
+    try:
+        devices = await service.update_device_readings_batch(
+            [(r.device_id, r.pressure, r.threshold) for r in request.readings]
+        )
+        return ORJSONResponse([d.to_dict() for d in devices])
+
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.patch("/{device_id}/assign-cubicle", responses={200: {"model": DeviceResponse}})
 async def assign_device_to_cubicle(
         device_id: str,
         request: AssignCubicleRequest,
@@ -143,10 +243,10 @@ async def assign_device_to_cubicle(
 ):
     """Assign a device to a cubicle (for web app)"""
     try:
-        logger.info(f"Assigning device {device_id} to cubicle {request.cubicle_id}")
+        logger.debug("Assigning device %s to cubicle %s", device_id, request.cubicle_id)
         device = await service.assign_device_to_cubicle(device_id, request.cubicle_id)
-        logger.info(f"Device {device_id} assigned successfully")
-        return DeviceResponse(**device.to_dict())
+        logger.debug("Device %s assigned successfully", device_id)
+        return ORJSONResponse(device.to_dict())
     except ValueError as e:
         logger.error(f"Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -155,17 +255,17 @@ async def assign_device_to_cubicle(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.patch("/{device_id}/unassign-cubicle", response_model=DeviceResponse)
+@router.patch("/{device_id}/unassign-cubicle", responses={200: {"model": DeviceResponse}})
 async def unassign_device_from_cubicle(
         device_id: str,
         service: DeviceService = Depends(get_device_service)
 ):
     """Remove cubicle assignment from device"""
     try:
-        logger.info(f"Unassigning device {device_id} from cubicle")
+        logger.debug("Unassigning device %s from cubicle", device_id)
         device = await service.unassign_device_from_cubicle(device_id)
-        logger.info(f"Device {device_id} unassigned successfully")
-        return DeviceResponse(**device.to_dict())
+        logger.debug("Device %s unassigned successfully", device_id)
+        return ORJSONResponse(device.to_dict())
     except ValueError as e:
         logger.error(f"Error: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -174,7 +274,7 @@ async def unassign_device_from_cubicle(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/cubicle/{cubicle_id}", response_model=DeviceResponse)
+@router.get("/cubicle/{cubicle_id}", responses={200: {"model": DeviceResponse}})
 async def get_device_by_cubicle(
         cubicle_id: int,
         service: DeviceService = Depends(get_device_service)
@@ -183,54 +283,86 @@ async def get_device_by_cubicle(
     device = await service.get_device_by_cubicle(cubicle_id)
     if not device:
         raise HTTPException(status_code=404, detail=f"No device assigned to cubicle {cubicle_id}")
-    return DeviceResponse(**device.to_dict())
+    return ORJSONResponse(device.to_dict())
+
 
+@router.get("/summaries", responses={200: {"model": List[DeviceSummaryResponse]}})
+async def get_device_summaries(
+        branch_id: str = Query(..., description="Branch ID to list devices for"),
+        status: Optional[str] = Query(None, description="Optional status filter (available, occupied, offline, error)"),
+        service: DeviceService = Depends(get_device_service)
+):
+    """Get lightweight device summaries for a branch (no reading data)"""
+    try:
+        status_filter = DeviceStatus(status) if status else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
 
-@router.get("/status/available", response_model=List[DeviceResponse])
+    summaries = await service.get_device_summaries(branch_id, status_filter)
+    return ORJSONResponse([s.to_dict() for s in summaries])
+
+
+@router.get("/status/available", responses={200: {"model": List[DeviceResponse]}})
 async def get_available_devices(
         branch_id: Optional[str] = Query(None, description="Filter by branch ID"),
         service: DeviceService = Depends(get_device_service)
 ):
     """Get all available devices from database"""
     devices = await service.get_available_devices(branch_id)
-    return [DeviceResponse(**d.to_dict()) for d in devices]
+    # Serializa directo con orjson, sin pasar por jsonable_encoder ni
+    # revalidar contra el response_model
+    return ORJSONResponse([d.to_dict() for d in devices])
 
 
-@router.get("/status/occupied", response_model=List[DeviceResponse])
+@router.get("/status/occupied", responses={200: {"model": List[DeviceResponse]}})
 async def get_occupied_devices(
         branch_id: Optional[str] = Query(None, description="Filter by branch ID"),
         service: DeviceService = Depends(get_device_service)
 ):
     """Get all occupied devices from database"""
     devices = await service.get_occupied_devices(branch_id)
-    return [DeviceResponse(**d.to_dict()) for d in devices]
+    return ORJSONResponse([d.to_dict() for d in devices])
 
 
-@router.get("/health/backend", response_model=HealthResponse)
+@router.get("/health/backend", responses={200: {"model": HealthResponse}})
 async def check_backend_health(
         service: DeviceService = Depends(get_device_service)
 ):
-    """Check if backend is reachable"""
-    backend_ok = await service.check_backend_health()
-
-    return HealthResponse(
-        edge_api="online",
-        backend=_backend_url or "not_configured",
-        backend_reachable=backend_ok
-    )
-
-
-@router.post("/maintenance/check-offline", response_model=List[DeviceResponse])
+    """Check if backend is reachable (cached, singleflight probe)"""
+    if time.monotonic() - _health_cache["ts"] >= _health_cache["ttl"]:
+        async with _health_lock:
+            # Re-check despues del lock: otro probe pudo refrescar ya
+            if time.monotonic() - _health_cache["ts"] >= _health_cache["ttl"]:
+                try:
+                    ok = await asyncio.wait_for(
+                        service.check_backend_health(),
+                        timeout=_HEALTH_PROBE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    ok = False
+
+                _health_cache["ts"] = time.monotonic()
+                _health_cache["ok"] = ok
+                _health_cache["ttl"] = _HEALTH_TTL_OK if ok else _HEALTH_TTL_FAIL
+
+    return ORJSONResponse({
+        "edge_api": "online",
+        "backend": _backend_url or "not_configured",
+        "backend_reachable": _health_cache["ok"]
+    })
+
+
+@router.post("/maintenance/check-offline", responses={200: {"model": List[DeviceResponse]}})
 async def check_offline_devices(
         timeout_minutes: int = Query(5, ge=1, description="Minutes without update to consider offline"),
         service: DeviceService = Depends(get_device_service)
 ):
     """Check and mark devices as offline if no recent updates"""
     devices = await service.check_offline_devices(timeout_minutes)
-    return [DeviceResponse(**d.to_dict()) for d in devices]
+    return ORJSONResponse([d.to_dict() for d in devices])
 
 
-@router.get("/{device_id}", response_model=DeviceResponse)
+@router.get("/{device_id}", responses={200: {"model": DeviceResponse}})
 async def get_device(
         device_id: str,
         service: DeviceService = Depends(get_device_service)
@@ -239,7 +371,7 @@ async def get_device(
     device = await service.get_device(device_id)
     if not device:
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
-    return DeviceResponse(**device.to_dict())
+    return ORJSONResponse(device.to_dict())
 
 
 @router.delete("/{device_id}", status_code=204)
@@ -254,7 +386,7 @@ async def delete_device(
     return None
 
 
-@router.get("/", response_model=List[DeviceResponse])
+@router.get("", responses={200: {"model": List[DeviceResponse]}})
 async def get_all_devices(
         branch_id: Optional[str] = Query(None, description="Filter by branch ID"),
         service: DeviceService = Depends(get_device_service)
@@ -262,7 +394,9 @@ async def get_all_devices(
     """Get all devices from database or filter by branch"""
     if branch_id:
         devices = await service.get_devices_by_branch(branch_id)
-    else:
-        devices = await service.get_all_devices()
+        return ORJSONResponse([d.to_dict() for d in devices])
 
-    return [DeviceResponse(**d.to_dict()) for d in devices]
\ No newline at end of file
+    # Consume the stream inside the handler (the request session closes
+    # when it returns), building a single response list instead of a
+    # Device list plus a DTO list
+    return ORJSONResponse([d.to_dict() async for d in service.stream_all_devices()])
\ No newline at end of file
@@ -4,10 +4,15 @@ import os
 import sys
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 
+from infrastructure.http.backend_sync_worker import start_sync_worker, stop_sync_worker
+from infrastructure.http.http_client import close_http_client
 from infrastructure.persistence.configuration.database_configuration import init_db, close_db
 from interface.api.device_controller import router as device_router, set_backend_url
 
@@ -18,8 +23,9 @@ if sys.platform == 'win32':
 
 
 # Configure logging
+# Per-request logging vive en DEBUG; INFO queda para lifespan y errores
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.environ.get("LOG_LEVEL", "INFO"),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
@@ -39,10 +45,15 @@ async def lifespan(_app: FastAPI):
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized successfully")
+    logger.info("Starting backend sync worker...")
+    await start_sync_worker(BACKEND_URL)
     logger.info("=" * 60)
 
     yield
 
+    logger.info("Stopping backend sync worker...")
+    await stop_sync_worker()
+    await close_http_client()
     logger.info("Closing database...")
     await close_db()
     logger.info("Database closed")
@@ -55,9 +66,17 @@ app = FastAPI(
     version="2.0.0",
     docs_url=None,  # ⬅️ Deshabilitar
     redoc_url=None,  # ⬅️ Deshabilitar
+    openapi_url=None,  # se sirve cacheado abajo, no regenerado por request
+    # Sin redirect 307 por slash final: los ESP32 pegan directo a la ruta
+    redirect_slashes=False,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Las listas de dispositivos son JSON repetitivo (~10x comprimible);
+# el umbral deja pasar respuestas chicas como /health sin comprimir
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware, # type: ignore
@@ -75,6 +94,20 @@ logger.info(f"Backend URL configured: {BACKEND_URL}")
 app.include_router(device_router)
 
 
+# El schema OpenAPI no cambia en runtime: se genera y serializa UNA vez
+# (la primera pasada recorre todas las rutas y es cara) y de ahí en
+# adelante se devuelven los mismos bytes
+_openapi_bytes: bytes | None = None
+
+
+@app.get("/openapi.json", include_in_schema=False)
+async def openapi_json():
+    global _openapi_bytes
+    if _openapi_bytes is None:
+        _openapi_bytes = orjson.dumps(app.openapi())
+    return Response(_openapi_bytes, media_type="application/json")
+
+
 @app.get("/api/docs", include_in_schema=False)
 async def custom_swagger_ui():
     """Custom Swagger UI with reliable CDN"""
@@ -96,25 +129,32 @@ async def custom_redoc():
     )
 
 
+# Payloads fijos desde el arranque: serializados una vez a bytes, cero
+# trabajo por request (el balanceador pega a /health cada segundo)
+_ROOT_JSON = orjson.dumps({
+    "service": "BibFlip IoT Edge API",
+    "version": "2.0.0",
+    "status": "running",
+    "backend": BACKEND_URL,
+    "docs": "/api/docs",
+    "redoc": "/api/redoc"
+})
+
+_HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "edge_api": "online",
+    "backend_url": BACKEND_URL
+})
+
+
 @app.get("/")
 async def root():
-    return {
-        "service": "BibFlip IoT Edge API",
-        "version": "2.0.0",
-        "status": "running",
-        "backend": BACKEND_URL,
-        "docs": "/api/docs",
-        "redoc": "/api/redoc"
-    }
+    return Response(_ROOT_JSON, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "edge_api": "online",
-        "backend_url": BACKEND_URL
-    }
+    return Response(_HEALTH_JSON, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -129,9 +169,27 @@ if __name__ == "__main__":
     logger.info(f"Backend: {BACKEND_URL}")
     logger.info("=" * 60)
 
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        log_level="info"
-    )
\ No newline at end of file
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+    if sys.platform == 'win32':
+        # Dev en Windows: selector loop (ya configurado arriba), 1 worker
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            log_level="info"
+        )
+    else:
+        # uvloop + httptools (vienen con uvicorn[standard]) y access log
+        # apagado: el logging por request va por LOG_LEVEL, no por uvicorn
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            proxy_headers=True,
+            log_level="warning",
+            access_log=False
+        )
\ No newline at end of file
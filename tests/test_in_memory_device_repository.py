@@ -0,0 +1,146 @@
+"""Tests del mantenimiento de índices secundarios del repositorio en memoria.
+
+Los tests son funciones síncronas que corren su corutina con asyncio.run,
+así la suite no necesita pytest-asyncio.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from domain.model.aggregates.device import Device, DeviceId, DeviceType, Location
+from domain.model.valueobjects.device_status import DeviceStatus
+from infrastructure.persistence.repositories.in_memory_device_repository import (
+    InMemoryDeviceRepository,
+)
+
+
+def _device(
+        device_id: str = "dev-001",
+        branch_id: str = "branch-1",
+        status: DeviceStatus = DeviceStatus.OFFLINE,
+        cubicle_id=None,
+        last_update=None
+) -> Device:
+    return Device(
+        id=DeviceId(device_id),
+        type=DeviceType.CHAIR_SENSOR,
+        status=status,
+        location=Location(branch_id=branch_id, zone="zone-A", position="P1"),
+        cubicle_id=cubicle_id,
+        last_update=last_update
+    )
+
+
+def test_save_overwrite_reindexes_branch_and_status():
+    async def scenario():
+        repo = InMemoryDeviceRepository()
+        await repo.save(_device(branch_id="branch-1", status=DeviceStatus.AVAILABLE))
+
+        # Mismo id, otra sucursal y otro estado: las entradas viejas de los
+        # índices deben desaparecer junto con la versión anterior
+        await repo.save(_device(branch_id="branch-2", status=DeviceStatus.OCCUPIED))
+
+        assert await repo.find_by_branch("branch-1") == []
+        assert await repo.find_by_status(DeviceStatus.AVAILABLE) == []
+
+        in_branch_2 = await repo.find_by_branch("branch-2")
+        assert [d.id.value for d in in_branch_2] == ["dev-001"]
+        occupied = await repo.find_by_branch_and_status("branch-2", DeviceStatus.OCCUPIED)
+        assert [d.id.value for d in occupied] == ["dev-001"]
+
+    asyncio.run(scenario())
+
+
+def test_update_reading_transitions_status_index():
+    async def scenario():
+        repo = InMemoryDeviceRepository()
+        await repo.save(_device())
+        now = datetime.now(timezone.utc)
+
+        device, previous = await repo.update_reading_atomic(
+            DeviceId("dev-001"), pressure=80.0, threshold=30.0, now=now
+        )
+        assert previous is DeviceStatus.OFFLINE
+        assert device.status is DeviceStatus.OCCUPIED
+        assert await repo.find_by_status(DeviceStatus.OFFLINE) == []
+
+        # Por debajo del umbral: sale de occupied y entra a available
+        device, previous = await repo.update_reading_atomic(
+            DeviceId("dev-001"), pressure=5.0, threshold=30.0, now=now
+        )
+        assert previous is DeviceStatus.OCCUPIED
+        assert device.status is DeviceStatus.AVAILABLE
+        assert await repo.find_by_status(DeviceStatus.OCCUPIED) == []
+        available = await repo.find_by_status(DeviceStatus.AVAILABLE)
+        assert [d.id.value for d in available] == ["dev-001"]
+
+        # Device inexistente: no revienta ni toca índices
+        missing, previous = await repo.update_reading_atomic(
+            DeviceId("no-such"), pressure=50.0, threshold=30.0, now=now
+        )
+        assert missing is None and previous is None
+
+    asyncio.run(scenario())
+
+
+def test_sweep_offline_reindexes_only_stale_devices():
+    async def scenario():
+        repo = InMemoryDeviceRepository()
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(minutes=10)
+
+        await repo.save(_device("dev-001", status=DeviceStatus.OCCUPIED, last_update=stale))
+        await repo.save(_device("dev-002", status=DeviceStatus.AVAILABLE, last_update=now))
+        # Ya offline: el sweep no debe volver a reportarlo
+        await repo.save(_device("dev-003", status=DeviceStatus.OFFLINE, last_update=stale))
+
+        swept = await repo.sweep_offline(cutoff=now - timedelta(minutes=5), now=now)
+
+        assert [d.id.value for d in swept] == ["dev-001"]
+        assert swept[0].status is DeviceStatus.OFFLINE
+        assert await repo.find_by_status(DeviceStatus.OCCUPIED) == []
+        offline_ids = {d.id.value for d in await repo.find_by_status(DeviceStatus.OFFLINE)}
+        assert offline_ids == {"dev-001", "dev-003"}
+        available = await repo.find_by_status(DeviceStatus.AVAILABLE)
+        assert [d.id.value for d in available] == ["dev-002"]
+
+    asyncio.run(scenario())
+
+
+def test_assign_cubicle_rejects_taken_cubicle():
+    async def scenario():
+        repo = InMemoryDeviceRepository()
+        now = datetime.now(timezone.utc)
+        await repo.save(_device("dev-001"))
+        await repo.save(_device("dev-002"))
+
+        assigned = await repo.assign_cubicle_atomic(DeviceId("dev-001"), 7, now)
+        assert assigned.cubicle_id == 7
+
+        # Reasignar el mismo cubículo al mismo device es idempotente
+        assert (await repo.assign_cubicle_atomic(DeviceId("dev-001"), 7, now)).cubicle_id == 7
+
+        try:
+            await repo.assign_cubicle_atomic(DeviceId("dev-002"), 7, now)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError for taken cubicle")
+
+        found = await repo.find_by_cubicle_id(7)
+        assert found.id.value == "dev-001"
+
+    asyncio.run(scenario())
+
+
+def test_delete_cleans_indexes():
+    async def scenario():
+        repo = InMemoryDeviceRepository()
+        await repo.save(_device(status=DeviceStatus.AVAILABLE))
+
+        assert await repo.delete(DeviceId("dev-001")) is True
+        assert await repo.delete(DeviceId("dev-001")) is False
+        assert await repo.find_by_branch("branch-1") == []
+        assert await repo.find_by_status(DeviceStatus.AVAILABLE) == []
+        assert await repo.exists(DeviceId("dev-001")) is False
+
+    asyncio.run(scenario())